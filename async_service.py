@@ -0,0 +1,353 @@
+import asyncio
+import asyncpg
+import os
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import utils
+
+VALID_METADATA_KEYS = ['Title', 'Artist', 'Album', 'Genre',
+                       'Release Date', 'Track number', 'Composer',
+                       'Publisher', 'Track Length']
+
+SEARCH_COLUMNS = ['file_name', 'title', 'artist', 'album', 'genre', 'release_date', 'track_num', 'composer',
+                  'publisher', 'track_length', 'file_format']
+
+# maximum number of operations of each type running at the same time; every database operation takes its
+# connection while holding its slot, so the pool is sized to the sum of the limits and no type can starve another
+SEARCH_LIMIT = 32
+WRITE_LIMIT = 8
+INGEST_LIMIT = 4
+EXPORT_LIMIT = 2
+POOL_SIZE = SEARCH_LIMIT + WRITE_LIMIT + INGEST_LIMIT
+
+# threads used for disk work (copying, removing and archiving song files)
+DISK_WORKERS = 8
+
+
+class AsyncDatabasePool:
+    """
+    A singleton class to manage the asyncpg connection pool, the executor used for disk I/O and the limits of each
+    operation type. The limits are created together with the instance, so they are rebuilt after close().
+    """
+
+    instance = None
+
+    def __new__(cls):
+        if cls.instance is None:
+            cls.instance = super(AsyncDatabasePool, cls).__new__(cls)
+            cls.instance.pool = None
+            cls.instance.pool_lock = asyncio.Lock()
+            cls.instance.executor = ThreadPoolExecutor(max_workers=DISK_WORKERS)
+            cls.instance.search_semaphore = asyncio.Semaphore(SEARCH_LIMIT)
+            cls.instance.write_semaphore = asyncio.Semaphore(WRITE_LIMIT)
+            cls.instance.ingest_semaphore = asyncio.Semaphore(INGEST_LIMIT)
+            cls.instance.export_semaphore = asyncio.Semaphore(EXPORT_LIMIT)
+        return cls.instance
+
+    async def get_pool(self):
+        if self.pool is None:
+            # the first callers all arrive here before the pool exists, only one of them must create it
+            async with self.pool_lock:
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(
+                        database="SongStorage", user='postgres', password='1234', host='127.0.0.1', port=5432,
+                        min_size=2, max_size=POOL_SIZE
+                    )
+                    print("Connection pool created.")
+        return self.pool
+
+    async def run_in_executor(self, func, *args):
+        """Runs a blocking function on the disk executor and returns its result."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        self.executor.shutdown(wait=True)
+        AsyncDatabasePool.instance = None
+        print("Connection pool closed.")
+
+
+def _copy_file(source_path, destination_path):
+    """Copies a file in chunks, the same way Add_song does."""
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        for chunk in iter(lambda: source.read(4096), b''):
+            destination.write(chunk)
+
+
+def _reserve_file(path):
+    """Creates an empty file at the given path, raising FileExistsError if the path is already taken."""
+    open(path, 'xb').close()
+
+
+def _remove_if_exists(path):
+    """Removes a file, ignoring it if it was never created."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _parse_song_id(song_id):
+    """Returns the song id as an UUID or None if it is not a valid id."""
+    try:
+        return uuid.UUID(song_id)
+    except ValueError:
+        return None
+
+
+def _write_archive(archive_path, file_names):
+    """Writes the given song files from Storage into a ZIP archive."""
+    with zipfile.ZipFile(archive_path, 'w') as zip_file:
+        for file_name in file_names:
+            try:
+                zip_file.write(os.path.join("Storage", file_name), arcname=file_name)
+            except FileNotFoundError:
+                print(f"File '{file_name}' not found.")
+
+
+def _modify_id3_tags(song_path, metadata):
+    """Updates the ID3 tags of a mp3 file with the given metadata."""
+    for tag in ['Title', 'Artist', 'Album', 'Track number', 'Release Date']:
+        if tag in metadata and metadata[tag] is not None:
+            utils.modify_id3_metadata(song_path, tag, metadata[tag])
+
+
+async def add_song(song_path, metadata):
+    """Adds a song file to storage and its metadata to the database and returns the id of the added song.
+    The file is copied on the disk executor, so other operations are not blocked while it is written.
+
+        Args:
+        song_path (str) -- the file path of the song.
+        metadata (dict) -- a dictionary containing song metadata tags and values
+        """
+    database = AsyncDatabasePool()
+
+    async with database.ingest_semaphore:
+        if not os.path.exists("Storage"):
+            os.makedirs("Storage")
+
+        file_name = os.path.basename(song_path)
+        destination_path = os.path.join("Storage", file_name)
+
+        for k in VALID_METADATA_KEYS:
+            if k not in metadata or not metadata[k]:
+                metadata[k] = 'Unknown'
+
+        # an empty placeholder reserves the file name, so concurrent calls for the same name cannot both pass
+        try:
+            await database.run_in_executor(_reserve_file, destination_path)
+        except FileExistsError:
+            print(f"Error: '{file_name}' already exists in the storage.")
+            return
+
+        insert_query = """
+        INSERT INTO song_properties (id, file_name, title, artist, album, genre, release_date, track_num, composer, publisher, track_length, file_format)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+        """
+
+        song_id = uuid.uuid4()
+        file_extension = os.path.splitext(file_name)[1]
+
+        # the file is copied under a temporary name and only moved over the placeholder once its row is inserted
+        temporary_path = os.path.join("Storage", f".{song_id}.part")
+        inserted = False
+        stored = False
+        try:
+            await database.run_in_executor(_copy_file, song_path, temporary_path)
+
+            pool = await database.get_pool()
+            await pool.execute(insert_query,
+                               song_id,
+                               file_name,
+                               metadata['Title'],
+                               metadata['Artist'],
+                               metadata['Album'],
+                               metadata['Genre'],
+                               metadata['Release Date'],
+                               metadata['Track number'],
+                               metadata['Composer'],
+                               metadata['Publisher'],
+                               metadata['Track Length'],
+                               file_extension)
+            inserted = True
+
+            await database.run_in_executor(os.replace, temporary_path, destination_path)
+            stored = True
+        except FileNotFoundError:
+            if inserted:
+                print(f"Error in add_song: '{file_name}' could not be moved into the storage.")
+                raise
+            print("File not found. Provide a valid file path.")
+            return
+        except Exception as e:
+            print(f"Error in add_song: {e}")
+            raise
+        finally:
+            # nothing is left behind unless both the row and the file were stored
+            if not stored:
+                await database.run_in_executor(_remove_if_exists, temporary_path)
+                await database.run_in_executor(_remove_if_exists, destination_path)
+                if inserted:
+                    await pool.execute("DELETE FROM song_properties WHERE id = $1", song_id)
+
+        print(f"'{file_name}' was inserted into the database with id and added to the storage.")
+        return str(song_id)
+
+
+async def delete_song(song_id):
+    """Deletes a song from storage and the corresponding entry in database.
+
+       Args:
+       song_id (str) -- the id of the song from the database.
+       """
+    song_uuid = _parse_song_id(song_id)
+    if song_uuid is None:
+        print(f"No song with id {song_id}")
+        return
+
+    database = AsyncDatabasePool()
+
+    async with database.write_semaphore:
+        try:
+            pool = await database.get_pool()
+            file_name = await pool.fetchval(
+                "DELETE FROM song_properties WHERE id = $1 RETURNING file_name", song_uuid)
+        except asyncpg.PostgresError as e:
+            print(f"Error in delete_song: {e}")
+            raise
+
+        if file_name is None:
+            print(f"No song with id {song_id}")
+            return
+
+        await database.run_in_executor(os.remove, os.path.join("Storage", file_name))
+        print(f"Success: song deleted with id {song_id}")
+
+
+async def modify_data(song_id, metadata):
+    """Modifies the metadata of a song in the database, and if it's a '.mp3', it also modifies the file metadata
+    on the disk executor.
+
+        Args:
+        song_id (str) -- the id of the song whose metadata will be modified.
+        metadata (dict) -- a dictionary containing the tags and the desired values that the user wants to be updated.
+
+        """
+    invalid_keys = [key for key in metadata.keys() if key not in VALID_METADATA_KEYS]
+    if invalid_keys:
+        print(f"Error: invalid metadata arguments: {invalid_keys}")
+        return
+
+    song_uuid = _parse_song_id(song_id)
+    if song_uuid is None:
+        print(f"Error in modify_data: No song with id {song_id} found")
+        return
+
+    database = AsyncDatabasePool()
+
+    async with database.write_semaphore:
+        update_query = """
+        UPDATE song_properties
+        SET title = COALESCE($1, title),
+            artist = COALESCE($2, artist),
+            album = COALESCE($3, album),
+            genre = COALESCE($4, genre),
+            release_date = COALESCE($5, release_date),
+            track_num = COALESCE($6, track_num),
+            composer = COALESCE($7, composer),
+            publisher = COALESCE($8, publisher),
+            track_length = COALESCE($9, track_length)
+        WHERE id = $10
+        RETURNING file_name
+        """
+
+        try:
+            pool = await database.get_pool()
+            file_name = await pool.fetchval(update_query,
+                                            metadata.get('Title'),
+                                            metadata.get('Artist'),
+                                            metadata.get('Album'),
+                                            metadata.get('Genre'),
+                                            metadata.get('Release Date'),
+                                            metadata.get('Track number'),
+                                            metadata.get('Composer'),
+                                            metadata.get('Publisher'),
+                                            metadata.get('Track Length'),
+                                            song_uuid)
+        except asyncpg.PostgresError as e:
+            print(f"Error in modify_data: {e}")
+            raise
+
+        if file_name is None:
+            print(f"Error in modify_data: No song with id {song_id} found")
+            return
+
+        song_path = os.path.join("Storage", file_name)
+        if os.path.splitext(song_path)[1] == ".mp3":
+            await database.run_in_executor(_modify_id3_tags, song_path, metadata)
+
+        print(f"Success: song metadata updated for song with id {song_id}")
+
+
+async def search(filters):
+    """Searches for songs in the database based on given filters and returns a list of the songs found or None if
+    there are no songs matching the filters.
+
+    Args:
+    filters (dict) -- a dictionary containing (tag:value) filters for searching song properties.
+    """
+    filters = {utils.transform_to_snake_case(key): value for key, value in filters.items() if value is not None}
+
+    invalid_columns = [key for key in filters.keys() if key not in SEARCH_COLUMNS]
+    if invalid_columns:
+        print(f"Columns {invalid_columns} do not exist in the database.")
+        return None
+
+    # the columns come from SEARCH_COLUMNS, only the values are sent as parameters
+    conditions = [f"{column} ILIKE ${i}" for i, column in enumerate(filters.keys(), start=1)]
+    search_query = f"SELECT {', '.join(SEARCH_COLUMNS)} FROM song_properties"
+    if conditions:
+        search_query += " WHERE " + " AND ".join(conditions)
+
+    database = AsyncDatabasePool()
+
+    async with database.search_semaphore:
+        try:
+            pool = await database.get_pool()
+            songs_found = await pool.fetch(search_query, *filters.values())
+        except asyncpg.PostgresError as e:
+            print(f"Error in search: {e}")
+            raise
+
+    if songs_found:
+        return songs_found
+    print("No songs found for your search filters.")
+
+
+async def create_save_list(output_folder, filters):
+    """Creates a savelist of songs matching filters specified by user and saves it into a ZIP archive on a
+    specified path provided by the user. The archive is built on the disk executor.
+
+    Args:
+    output_folder (str) -- the directory path where the savelist will be saved.
+    filters (dict) -- a dictionary containing filters for searching song properties.
+    """
+    songs_found = await search(filters)
+
+    if not songs_found:
+        return
+
+    database = AsyncDatabasePool()
+
+    async with database.export_semaphore:
+        try:
+            await database.run_in_executor(_write_archive, os.path.join(output_folder, "playlist.zip"),
+                                           [song['file_name'] for song in songs_found])
+        except OSError as e:
+            print(f"Error in create_save_list: {e}")
+            return
+
+    print("Archive created!")
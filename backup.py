@@ -0,0 +1,211 @@
+import psycopg2
+import gzip
+import os
+import zipfile
+from crud import DatabaseSingleton
+
+CATALOG_FILES = {
+    'binary': 'song_properties.bin',
+    'csv': 'song_properties.csv.gz'
+}
+STORAGE_ARCHIVE = 'storage.zip'
+STAGING_TABLE = 'song_properties_staging'
+
+
+def _open_catalog_file(path, file_format, mode):
+    """Opens the catalog dump file, using gzip for the csv format and returns the file object.
+
+    Args:
+    path (str) -- the path of the catalog dump file.
+    file_format (str) -- 'binary' or 'csv'.
+    mode (str) -- 'rb' for reading or 'wb' for writing.
+    """
+    if file_format == 'csv':
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _copy_options(file_format):
+    """Returns the COPY options matching the given dump format."""
+    if file_format == 'csv':
+        return "(FORMAT csv, HEADER true)"
+    return "(FORMAT binary)"
+
+
+def Export_catalog(output_folder, file_format='binary', include_storage=False):
+    """Exports the whole song_properties table into a single file by streaming it with COPY and, if requested,
+    bundles the files from Storage into a ZIP archive next to it. Returns the path of the catalog file.
+
+    Args:
+    output_folder (str) -- the directory where the export will be saved.
+    file_format (str) -- 'binary' for the PostgreSQL binary COPY format or 'csv' for gzip compressed csv.
+    include_storage (bool) -- if True, the song files from Storage are archived too.
+    """
+    if file_format not in CATALOG_FILES:
+        print(f"Error: invalid export format '{file_format}'. Supported formats: {list(CATALOG_FILES)}")
+        return
+
+    db_connection = DatabaseSingleton()
+    conn = db_connection.get_connection()
+    cursor = db_connection.get_cursor()
+
+    try:
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder)
+
+        catalog_path = os.path.join(output_folder, CATALOG_FILES[file_format])
+        copy_query = f"COPY song_properties TO STDOUT {_copy_options(file_format)}"
+
+        # the rows are streamed straight from the server into the file, without building python tuples
+        with _open_catalog_file(catalog_path, file_format, 'wb') as catalog_file:
+            cursor.copy_expert(copy_query, catalog_file)
+
+        if include_storage and os.path.exists("Storage"):
+            # audio files are already compressed, so they are stored as they are
+            with zipfile.ZipFile(os.path.join(output_folder, STORAGE_ARCHIVE), 'w', zipfile.ZIP_STORED) as zip_file:
+                for file_name in os.listdir("Storage"):
+                    zip_file.write(os.path.join("Storage", file_name), arcname=file_name)
+
+        print(f"Success: catalog exported to '{catalog_path}'")
+        return catalog_path
+
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Error in Export_catalog: {e}")
+        raise
+    except OSError as e:
+        conn.rollback()
+        print(f"Error in Export_catalog: {e}")
+
+
+def _archive_members(input_folder):
+    """Checks the Storage archive of an export and returns the names of its files, an empty set if there is no
+    archive or None if the archive is corrupt.
+
+    Args:
+    input_folder (str) -- the directory containing the export.
+    """
+    storage_archive = os.path.join(input_folder, STORAGE_ARCHIVE)
+    if not os.path.exists(storage_archive):
+        return set()
+
+    try:
+        with zipfile.ZipFile(storage_archive, 'r') as zip_file:
+            bad_file = zip_file.testzip()
+            if bad_file is not None:
+                print(f"Error: '{bad_file}' is corrupt in '{storage_archive}'")
+                return None
+            return set(zip_file.namelist())
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"Error: cannot read '{storage_archive}': {e}")
+        return None
+
+
+def Import_catalog(input_folder, file_format='binary', replace=False):
+    """Imports a catalog exported by Export_catalog. The rows are loaded with COPY into a staging table without
+    indexes, then either merged into song_properties or swapped in place of it, in which case the primary key is
+    built once, after the load. Returns the number of songs imported.
+
+    When merging, songs with an existing id are skipped, and so are songs whose file name is already used by a song in
+    the catalog or by a file in Storage, so that no imported song points to an unrelated file. When replacing, the
+    files in Storage that do not belong to the imported catalog are removed. If a Storage archive is present, it is
+    checked before anything is imported and the files of the imported songs are extracted into Storage.
+
+    Args:
+    input_folder (str) -- the directory containing the export.
+    file_format (str) -- 'binary' or 'csv', the format used when exporting.
+    replace (bool) -- if True, the current catalog is replaced by the imported one, else the two are merged.
+    """
+    if file_format not in CATALOG_FILES:
+        print(f"Error: invalid import format '{file_format}'. Supported formats: {list(CATALOG_FILES)}")
+        return
+
+    catalog_path = os.path.join(input_folder, CATALOG_FILES[file_format])
+    if not os.path.exists(catalog_path):
+        print(f"Error: no catalog file found at '{catalog_path}'")
+        return
+
+    archive_members = _archive_members(input_folder)
+    if archive_members is None:
+        return
+
+    if not os.path.exists("Storage"):
+        os.makedirs("Storage")
+
+    db_connection = DatabaseSingleton()
+    conn = db_connection.get_connection()
+    cursor = db_connection.get_cursor()
+
+    try:
+        # LIKE copies the columns and defaults but no indexes, so the load does not maintain any
+        cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(f"CREATE TABLE {STAGING_TABLE} (LIKE song_properties INCLUDING DEFAULTS)")
+
+        copy_query = f"COPY {STAGING_TABLE} FROM STDIN {_copy_options(file_format)}"
+        with _open_catalog_file(catalog_path, file_format, 'rb') as catalog_file:
+            cursor.copy_expert(copy_query, catalog_file)
+
+        if replace:
+            cursor.execute(f"SELECT file_name FROM {STAGING_TABLE}")
+            imported_files = {row[0] for row in cursor.fetchall()}
+            imported_rows = cursor.rowcount
+
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD PRIMARY KEY (id)")
+            cursor.execute("DROP TABLE song_properties")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO song_properties")
+            cursor.execute("ALTER INDEX song_properties_staging_pkey RENAME TO song_properties_pkey")
+        else:
+            cursor.execute(f"DELETE FROM {STAGING_TABLE} s USING song_properties p WHERE s.id = p.id")
+            existing_rows = cursor.rowcount
+
+            # a file name already used in the catalog or in Storage would link the song to an unrelated file
+            cursor.execute(f"DELETE FROM {STAGING_TABLE} s USING song_properties p WHERE s.file_name = p.file_name "
+                           f"RETURNING s.file_name")
+            colliding_files = {row[0] for row in cursor.fetchall()}
+            cursor.execute(f"SELECT DISTINCT file_name FROM {STAGING_TABLE}")
+            stored_files = [row[0] for row in cursor.fetchall() if os.path.exists(os.path.join("Storage", row[0]))]
+            if stored_files:
+                cursor.execute(f"DELETE FROM {STAGING_TABLE} WHERE file_name = ANY(%s)", (stored_files,))
+                colliding_files.update(stored_files)
+
+            cursor.execute(f"INSERT INTO song_properties SELECT * FROM {STAGING_TABLE} RETURNING file_name")
+            imported_files = {row[0] for row in cursor.fetchall()}
+            imported_rows = cursor.rowcount
+            cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+            if existing_rows:
+                print(f"Skipped {existing_rows} songs already in the catalog.")
+            if colliding_files:
+                print(f"Skipped the songs with file names already in use: {sorted(colliding_files)}")
+
+        conn.commit()
+
+    except psycopg2.Error as e:
+        # the shared connection must not be left in a failed transaction with a half built staging table
+        conn.rollback()
+        print(f"Error in Import_catalog: {e}")
+        raise
+    except Exception as e:
+        conn.rollback()
+        print(f"Error in Import_catalog: {e}")
+        return
+
+    try:
+        if archive_members:
+            with zipfile.ZipFile(os.path.join(input_folder, STORAGE_ARCHIVE), 'r') as zip_file:
+                zip_file.extractall("Storage", members=[name for name in archive_members if name in imported_files])
+
+        if replace:
+            orphan_files = [name for name in os.listdir("Storage")
+                            if name not in imported_files and os.path.isfile(os.path.join("Storage", name))]
+            for file_name in orphan_files:
+                os.remove(os.path.join("Storage", file_name))
+            if orphan_files:
+                print(f"Removed {len(orphan_files)} files from Storage that are not in the imported catalog.")
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"Error in Import_catalog: {imported_rows} songs were imported into the catalog, but Storage could not "
+              f"be updated: {e}")
+        return imported_rows
+
+    print(f"Success: {imported_rows} songs imported from '{catalog_path}'")
+    return imported_rows
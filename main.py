@@ -1,4 +1,6 @@
 import os
+import psycopg2
+import backup
 import crud
 import filtering
 import utils
@@ -15,8 +17,10 @@ def display_menu():
     print("--*-- 4 --*--. Search (filters)")
     print("--*-- 5 --*--. Create Save List (output path, filters)")
     print("--*-- 6 --*--. Play (song name from storage)")
-    print("--*-- 7 --*--. Exit")
-    return input("Please enter your choice (1-7): ")
+    print("--*-- 7 --*--. Export Catalog (output path, format, include storage)")
+    print("--*-- 8 --*--. Import Catalog (input path, format, replace)")
+    print("--*-- 9 --*--. Exit")
+    return input("Please enter your choice (1-9): ")
 
 
 def add_song():
@@ -103,6 +107,32 @@ def play():
         print(f"Error in Play: {e}")
 
 
+def export_catalog():
+    """Export the catalog and optionally the Storage files by using Export_catalog function from 'backup' file."""
+    output_path = input("Enter the output path for the export: ")
+    file_format = input("Format (binary/csv) [binary]: ").strip().lower() or 'binary'
+    include_storage = input("Include Storage files? (y/n) [n]: ").strip().lower() == 'y'
+
+    try:
+        backup.Export_catalog(output_path, file_format, include_storage)
+    except psycopg2.Error:
+        # Export_catalog has already rolled back and printed the error
+        print("Export failed, returning to the menu.")
+
+
+def import_catalog():
+    """Import a catalog exported by SongStorage by using Import_catalog function from 'backup' file."""
+    input_path = input("Enter the path of the export: ")
+    file_format = input("Format (binary/csv) [binary]: ").strip().lower() or 'binary'
+    replace = input("Replace the current catalog? (y/n) [n]: ").strip().lower() == 'y'
+
+    try:
+        backup.Import_catalog(input_path, file_format, replace)
+    except psycopg2.Error:
+        # Import_catalog has already rolled back and printed the error
+        print("Import failed, returning to the menu.")
+
+
 if __name__ == '__main__':
     """The entry point of the application."""
 
@@ -132,8 +162,13 @@ if __name__ == '__main__':
         elif choice == '6':
             play()
         elif choice == '7':
+            export_catalog()
+            conn.commit()
+        elif choice == '8':
+            import_catalog()
+        elif choice == '9':
             print("Goodbye!")
             conn.close()
             break
         else:
-            print("Enter a number between 1 and 7.")
+            print("Enter a number between 1 and 9.")